@@ -1,12 +1,16 @@
 from typing import Annotated
 from datetime import datetime
-from sqlalchemy import create_engine, ForeignKey, String, Integer, Text, Index, DateTime
-from sqlalchemy.orm import sessionmaker, Mapped, mapped_column, relationship
+from sqlalchemy import create_engine, event, ForeignKey, String, Integer, Text, Index, DateTime, Computed
+from sqlalchemy.orm import sessionmaker, Mapped, mapped_column, relationship, selectinload, undefer, scoped_session, object_session
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import text
+from sqlalchemy import URL, inspect, text, select, insert, func, tuple_, literal_column, lambda_stmt
 
+from collections import OrderedDict
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
+import threading
+import time
 
 load_dotenv()
 
@@ -16,6 +20,11 @@ data_user = os.getenv("DATA_USER", "")
 data_password = os.getenv("DATA_PASSWORD", "")
 data_table = os.getenv("DATA_TABLE", "article_system")
 data_address = os.getenv("DATA_ADDRESS", "localhost")
+# MySQL 驱动：默认使用 C 扩展实现的 mysqlclient（安装方式见 README），可设置为 pymysql（纯 Python）
+mysql_driver = os.getenv("MYSQL_DRIVER", "mysqldb")
+
+# SQL 日志默认关闭，设置 SQL_ECHO=1 时开启（输出所有语句和参数，会显著拖慢查询）
+sql_echo = os.getenv("SQL_ECHO", "0") == "1"
 
 # 端口号处理
 data_port_str = os.getenv("DATA_PORT")
@@ -27,40 +36,59 @@ if data_port_str and data_port_str.lower() != 'none':
 else:
     data_port = None
 
-# 构建数据库连接字符串
-if data_type.lower() == "sqlite":
-    # SQLite 数据库
-    database_url = f"sqlite:///{data_table}.db"
-elif data_type.lower() == "mysql":
-    # MySQL 数据库，使用 PyMySQL 驱动
-    if data_port:
-        database_url = f"mysql+pymysql://{data_user}:{data_password}@{data_address}:{data_port}/{data_table}"
-    else:
-        database_url = f"mysql+pymysql://{data_user}:{data_password}@{data_address}/{data_table}"
-else:
-    # 其他数据库
-    if data_port:
-        database_url = f"{data_type}://{data_user}:{data_password}@{data_address}:{data_port}/{data_table}"
-    else:
-        database_url = f"{data_type}://{data_user}:{data_password}@{data_address}/{data_table}"
+# 构建数据库连接地址，URL.create 会对用户名和密码中的特殊字符进行转义
+def build_url():
+    db_type = data_type.lower()
+    if db_type == "sqlite":
+        # SQLite 数据库
+        return URL.create("sqlite", database=f"{data_table}.db")
+    # MySQL 驱动由 MYSQL_DRIVER 指定，其他数据库直接使用 DATA_TYPE 作为驱动名
+    drivername = f"mysql+{mysql_driver}" if db_type == "mysql" else data_type
+    return URL.create(
+        drivername,
+        username=data_user or None,
+        password=data_password or None,
+        host=data_address,
+        port=data_port,
+        database=data_table,
+    )
+
+
+database_url = build_url()
 
 # 字段类型定义
 primary_key_id = Annotated[int, mapped_column(primary_key=True)]
 str_field_not_null = Annotated[str, mapped_column(String(255), nullable=False)]
 str_field_null = Annotated[str, mapped_column(String(255), nullable=True)]
 text_field = Annotated[str, mapped_column(Text, nullable=False)]
+deferred_text_field = Annotated[str, mapped_column(Text, nullable=False, deferred=True)]  # 访问时才加载
 date_field = Annotated[datetime, mapped_column(DateTime, nullable=False, default=datetime.now)]
 update_time_field = Annotated[datetime, mapped_column(DateTime, nullable=True, default=datetime.now)]
 
 engine = create_engine(
     database_url,
-    echo=True,
+    echo=sql_echo,
     # 性能优化配置
     pool_size=10,  # 连接池大小
     max_overflow=20,  # 最大溢出连接数
     pool_pre_ping=True,  # 连接前检查
     pool_recycle=3600,  # 连接回收时间（秒）
+    query_cache_size=1200,  # SQL 编译缓存大小（默认 500）
 )
+
+# SQLite 连接参数优化：WAL 模式读写不互相阻塞，mmap 与更大的页缓存减少磁盘读取
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+        cursor.execute("PRAGMA cache_size=-65536")  # 64MB
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
 Base = declarative_base()
 
 
@@ -80,6 +108,11 @@ class User(Base):
     user_articles = relationship("Article", back_populates="article_author", cascade="all, delete-orphan")
     user_comments = relationship("Comment", back_populates="comment_author", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('idx_user_email', 'user_email', unique=True),
+        Index('idx_user_created_time', 'user_created_time'),
+    )
+
     def __repr__(self):
         return f"User(user_id={self.user_id}, user_name={self.user_name}, user_email={self.user_email}, " \
                f"user_gender={self.user_gender}, user_created_time={self.user_created_time})"
@@ -97,8 +130,21 @@ class Article(Base):
     
     # 关系定义
     article_author = relationship("User", back_populates="user_articles")
-    article_comments = relationship("Comment", back_populates="comment_article", cascade="all, delete-orphan")
-    article_labels = relationship("Label", back_populates="label_article", cascade="all, delete-orphan")
+    # 集合关系禁止隐式懒加载（访问时触发 SQL 会直接报错），需要时通过 selectinload 显式加载
+    article_comments = relationship("Comment", back_populates="comment_article", cascade="all, delete-orphan", lazy="raise_on_sql")
+    article_labels = relationship("Label", back_populates="label_article", cascade="all, delete-orphan", lazy="raise_on_sql")
+
+    __table_args__ = (
+        # 列表查询的覆盖索引（筛选列 + 排序列 + 主键），倒序分页时反向扫描并在取满一页后停止；
+        # PostgreSQL 额外包含列表查询所需的其余列，列表查询可仅扫描索引
+        # 按作者筛选并按创建时间排序，同时覆盖仅按作者筛选的查询
+        Index('idx_article_author_created', 'article_author_id', 'article_created_time', 'article_id',
+              postgresql_include=['article_title']),
+        # 按创建时间排序及游标分页
+        Index('idx_article_created_id', 'article_created_time', 'article_id',
+              postgresql_include=['article_title', 'article_author_id']),
+        Index('idx_article_title', 'article_title'),
+    )
 
     def __repr__(self):
         return f"Article(article_id={self.article_id}, article_title={self.article_title}, " \
@@ -109,7 +155,12 @@ class Comment(Base):
     __tablename__ = "comments"
     
     comment_id: Mapped[primary_key_id]
-    comment_content: Mapped[text_field]
+    comment_content: Mapped[deferred_text_field]
+    # 评论内容前 50 个字符，由数据库生成，用于列表预览而无需加载完整内容
+    # 延迟加载：旧数据库在 create_tables 补齐该列之前仍可正常查询评论
+    comment_preview: Mapped[str] = mapped_column(
+        String(50), Computed("substr(comment_content, 1, 50)", persisted=True), deferred=True
+    )
     comment_author_id: Mapped[int] = mapped_column(ForeignKey("users.user_id"), nullable=False)
     comment_article_id: Mapped[int] = mapped_column(ForeignKey("articles.article_id"), nullable=False)
     comment_created_time: Mapped[date_field]
@@ -119,8 +170,14 @@ class Comment(Base):
     comment_author = relationship("User", back_populates="user_comments")
     comment_article = relationship("Article", back_populates="article_comments")
 
+    __table_args__ = (
+        Index('idx_comment_article', 'comment_article_id'),
+        Index('idx_comment_author', 'comment_author_id'),
+        Index('idx_comment_created_time', 'comment_created_time'),
+    )
+
     def __repr__(self):
-        return f"Comment(comment_id={self.comment_id}, comment_content={self.comment_content[:50]}..., " \
+        return f"Comment(comment_id={self.comment_id}, " \
                f"comment_author_id={self.comment_author_id}, comment_article_id={self.comment_article_id}, " \
                f"comment_created_time={self.comment_created_time})"
 
@@ -135,43 +192,146 @@ class Label(Base):
     # 关系定义
     label_article = relationship("Article", back_populates="article_labels")
 
+    __table_args__ = (
+        Index('idx_label_article', 'label_article_id'),
+        Index('idx_label_name', 'label_name'),
+    )
+
     def __repr__(self):
         return f"Label(label_id={self.label_id}, label_name={self.label_name}, label_article_id={self.label_article_id})"
 
 
-# 创建索引以提高查询性能
-def create_indexes():
-    """创建数据库索引以提高查询性能"""
-    # 文章表索引
-    Index('idx_article_author', Article.article_author_id)
-    Index('idx_article_created_time', Article.article_created_time)
-    Index('idx_article_title', Article.article_title)
-    
-    # 评论表索引
-    Index('idx_comment_article', Comment.comment_article_id)
-    Index('idx_comment_author', Comment.comment_author_id)
-    Index('idx_comment_created_time', Comment.comment_created_time)
-    
-    # 标签表索引
-    Index('idx_label_article', Label.label_article_id)
-    Index('idx_label_name', Label.label_name)
-    
-    # 用户表索引
-    Index('idx_user_email', User.user_email)
-    Index('idx_user_created_time', User.user_created_time)
+# MySQL ngram 解析器的分词长度（默认 ngram_token_size=2），更短的关键词无法通过全文索引匹配
+MYSQL_NGRAM_TOKEN_SIZE = 2
+
+
+# 创建全文索引，替代 LIKE '%keyword%' 的全表扫描
+def create_fulltext_index():
+    """根据数据库类型创建文章标题和内容的全文索引"""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            # FTS5 外部内容表，trigram 分词器支持中文子串匹配（需要 SQLite 3.34+）
+            existed = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+            )).first()
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5("
+                "article_title, article_content, "
+                "content='articles', content_rowid='article_id', tokenize='trigram')"
+            ))
+            # 通过触发器保持全文索引与 articles 表同步
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN "
+                "INSERT INTO articles_fts(rowid, article_title, article_content) "
+                "VALUES (new.article_id, new.article_title, new.article_content); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN "
+                "INSERT INTO articles_fts(articles_fts, rowid, article_title, article_content) "
+                "VALUES ('delete', old.article_id, old.article_title, old.article_content); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE ON articles BEGIN "
+                "INSERT INTO articles_fts(articles_fts, rowid, article_title, article_content) "
+                "VALUES ('delete', old.article_id, old.article_title, old.article_content); "
+                "INSERT INTO articles_fts(rowid, article_title, article_content) "
+                "VALUES (new.article_id, new.article_title, new.article_content); END"
+            ))
+            if not existed:
+                # 已有数据时重建索引
+                conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')"))
+        elif dialect == "mysql":
+            existed = conn.execute(text(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = 'articles' AND index_name = 'ft_article'"
+            )).first()
+            if not existed:
+                # ngram 解析器支持中文分词
+                conn.execute(text(
+                    "ALTER TABLE articles ADD FULLTEXT INDEX ft_article "
+                    "(article_title, article_content) WITH PARSER ngram"
+                ))
+            existed = conn.execute(text(
+                "SELECT 1 FROM information_schema.columns "
+                "WHERE table_schema = DATABASE() AND table_name = 'articles' "
+                "AND column_name = 'article_title_lower'"
+            )).first()
+            if not existed:
+                # 小写标题生成列 + B-Tree 索引，用于大小写不敏感的标题前缀搜索
+                conn.execute(text(
+                    "ALTER TABLE articles ADD COLUMN article_title_lower VARCHAR(255) "
+                    "GENERATED ALWAYS AS (LOWER(article_title)) STORED, "
+                    "ADD INDEX idx_article_title_lower (article_title_lower)"
+                ))
+        elif dialect == "postgresql":
+            # pg_trgm 三元组索引，使标题和内容的 ILIKE 匹配可以走索引（不依赖分词，支持中文子串）
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_article_title_trgm ON articles "
+                "USING gin (article_title gin_trgm_ops)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS idx_article_content_trgm ON articles "
+                "USING gin (article_content gin_trgm_ops)"
+            ))
+
+
+# 为已存在的旧表补齐新增的生成列（create_all 不会修改已存在的表）
+def add_missing_columns():
+    """为旧数据库的 comments 表添加 comment_preview 生成列"""
+    dialect = engine.dialect.name
+    existing = {column["name"] for column in inspect(engine).get_columns("comments")}
+    if "comment_preview" in existing:
+        return
+
+    # SQLite 只允许通过 ALTER TABLE 添加 VIRTUAL 生成列
+    storage = "VIRTUAL" if dialect == "sqlite" else "STORED"
+    if dialect in ("sqlite", "mysql", "postgresql"):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "ALTER TABLE comments ADD COLUMN comment_preview VARCHAR(50) "
+                f"GENERATED ALWAYS AS (substr(comment_content, 1, 50)) {storage}"
+            ))
 
 
 # 创建所有表
 def create_tables():
     Base.metadata.create_all(engine)
-    create_indexes()
+    add_missing_columns()
+    create_fulltext_index()
+
 
+# 创建会话工厂（提交后不过期实例，会话关闭后返回的对象仍可读取）
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 线程本地会话：同一线程内复用同一个会话及其身份映射，避免重复创建会话
+ScopedSession = scoped_session(SessionLocal)
 
 
-# 获取数据库会话
+# 会话上下文管理器，保证连接在使用后归还连接池
+@contextmanager
+def session_scope():
+    """
+    提供事务范围的会话：正常结束时提交，异常时回滚，最后移除线程本地会话
+    嵌套调用时复用外层会话，由最外层负责提交和移除
+    """
+    if ScopedSession.registry.has():
+        yield ScopedSession()
+        return
+
+    db = ScopedSession()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        ScopedSession.remove()
+
+
+# 获取数据库会话（供依赖注入使用的生成器形式，手动调用请使用 session_scope）
 def get_db():
     db = SessionLocal()
     try:
@@ -185,20 +345,33 @@ def get_articles_with_pagination(page: int = 1, page_size: int = 20, author_id:
     """
     分页查询文章，支持按作者筛选
     使用分页避免一次性加载大量数据
+    返回的文章为只读字典（article_id, article_title, article_created_time, article_author_id），
+    不构建 ORM 实例；作者信息可通过 get_user_by_id 从缓存获取，完整文章请使用 get_article_with_relations
     """
-    db = SessionLocal()
-    try:
-        query = db.query(Article)
+    with session_scope() as db:
+        offset = (page - 1) * page_size
+        
+        # 使用 lambda_stmt 缓存语句构建结果，闭包变量作为绑定参数传入
+        # 只查询列表所需的列，跳过 ORM 实例构建
+        stmt = lambda_stmt(lambda: select(
+            Article.article_id,
+            Article.article_title,
+            Article.article_created_time,
+            Article.article_author_id
+        ))
+        # 总数单独使用仅扫描索引的 COUNT 查询：若在分页查询中使用 COUNT(*) OVER ()，
+        # 数据库必须读取全部匹配行后才能应用 LIMIT，无法利用索引顺序提前结束
+        count_stmt = lambda_stmt(lambda: select(func.count()).select_from(Article))
         
         if author_id:
-            query = query.filter(Article.article_author_id == author_id)
+            stmt += lambda s: s.where(Article.article_author_id == author_id)
+            count_stmt += lambda s: s.where(Article.article_author_id == author_id)
         
-        # 按创建时间倒序排列
-        query = query.order_by(Article.article_created_time.desc())
+        # 按创建时间倒序排列并分页
+        stmt += lambda s: s.order_by(Article.article_created_time.desc()).offset(offset).limit(page_size)
         
-        # 分页
-        total = query.count()
-        articles = query.offset((page - 1) * page_size).limit(page_size).all()
+        total = db.execute(count_stmt).scalar()
+        articles = [dict(row) for row in db.execute(stmt).mappings().all()]
         
         return {
             "articles": articles,
@@ -207,28 +380,142 @@ def get_articles_with_pagination(page: int = 1, page_size: int = 20, author_id:
             "page_size": page_size,
             "total_pages": (total + page_size - 1) // page_size
         }
-    finally:
-        db.close()
 
 
-def search_articles(keyword: str, page: int = 1, page_size: int = 20):
+def get_articles_keyset(cursor: tuple = None, page_size: int = 20, author_id: int = None):
     """
-    搜索文章（标题和内容）
-    使用数据库全文搜索功能
+    游标分页查询文章，支持按作者筛选
+    cursor 为上一页最后一条记录的 (article_created_time, article_id)，
+    避免 OFFSET 深分页时扫描并丢弃大量数据
     """
+    with session_scope() as db:
+        stmt = select(Article)
+        
+        if author_id:
+            stmt = stmt.where(Article.article_author_id == author_id)
+        
+        if cursor:
+            stmt = stmt.where(tuple_(Article.article_created_time, Article.article_id) < tuple_(*cursor))
+        
+        # 按创建时间、ID 倒序排列，保证游标顺序稳定
+        stmt = stmt.order_by(
+            Article.article_created_time.desc(), Article.article_id.desc()
+        ).limit(page_size)
+        
+        articles = db.execute(stmt).scalars().all()
+        next_cursor = None
+        if len(articles) == page_size:
+            next_cursor = (articles[-1].article_created_time, articles[-1].article_id)
+        
+        return {
+            "articles": articles,
+            "page_size": page_size,
+            "next_cursor": next_cursor
+        }
+
+
+@contextmanager
+def iter_articles_by_author(author_id: int, batch_size: int = 1000):
+    """
+    流式遍历指定作者的全部文章，供批处理任务使用
+    使用服务端游标按批次读取，内存占用与批次大小相关而与总行数无关
+    以上下文管理器形式使用，提前结束遍历时也会在退出 with 块时释放连接和游标：
+        with iter_articles_by_author(author_id) as articles:
+            for article in articles:
+                ...
+    注意：yield_per 不能与集合关系的 joinedload 同时使用，需要预加载时请使用 selectinload
+    """
+    # 使用独立会话：服务端游标在遍历期间占用连接，不能与线程本地会话共享
     db = SessionLocal()
     try:
-        # 使用 LIKE 进行模糊搜索（简单实现）
-        # 生产环境建议使用数据库的全文搜索功能
-        query = db.query(Article).filter(
-            Article.article_title.contains(keyword) | 
-            Article.article_content.contains(keyword)
-        )
+        stmt = select(Article).where(
+            Article.article_author_id == author_id
+        ).order_by(Article.article_id).execution_options(yield_per=batch_size, stream_results=True)
         
-        total = query.count()
-        articles = query.order_by(Article.article_created_time.desc()).offset(
-            (page - 1) * page_size
-        ).limit(page_size).all()
+        yield db.scalars(stmt)
+    finally:
+        db.close()
+
+
+def search_articles(keyword: str, page: int = 1, page_size: int = 20, prefix: bool = False):
+    """
+    搜索文章（标题和内容）
+    使用数据库全文搜索功能：SQLite 使用 FTS5，MySQL 使用 FULLTEXT 索引，
+    PostgreSQL 使用 pg_trgm 三元组索引
+    prefix 为 True 时按标题前缀进行大小写不敏感搜索
+    """
+    with session_scope() as db:
+        dialect = engine.dialect.name
+        offset = (page - 1) * page_size
+        # 各分支均通过 selectinload 批量加载文章作者，避免 N+1 查询
+
+        if not prefix and dialect == "sqlite" and len(keyword) >= 3:
+            # trigram 分词要求关键词至少 3 个字符，按短语匹配
+            match_query = '"' + keyword.replace('"', '""') + '"'
+            rows = db.execute(
+                text("SELECT rowid, count(*) OVER () AS total_count FROM articles_fts "
+                     "WHERE articles_fts MATCH :q ORDER BY rank LIMIT :l OFFSET :o"),
+                {"q": match_query, "l": page_size, "o": offset}
+            ).all()
+            total = rows[0].total_count if rows else 0
+            if not rows and offset > 0:
+                # 页码超出范围时窗口函数没有返回行，单独统计总数
+                total = db.execute(
+                    text("SELECT count(*) FROM articles_fts WHERE articles_fts MATCH :q"),
+                    {"q": match_query}
+                ).scalar()
+            article_ids = [row[0] for row in rows]
+            # 按 ID 取回文章，并保持相关度排序
+            articles_by_id = {
+                article.article_id: article
+                for article in db.execute(
+                    select(Article).options(
+                        selectinload(Article.article_author)
+                    ).where(Article.article_id.in_(article_ids))
+                ).scalars().all()
+            } if article_ids else {}
+            articles = [articles_by_id[i] for i in article_ids if i in articles_by_id]
+        else:
+            # MySQL 短语内无法转义双引号，直接去除
+            mysql_phrase = keyword.replace('"', ' ').strip()
+            if prefix:
+                if dialect == "mysql":
+                    # 使用小写标题生成列上的 B-Tree 索引
+                    condition = literal_column("article_title_lower").startswith(keyword.lower(), autoescape=True)
+                elif dialect == "postgresql":
+                    # ILIKE 由 pg_trgm 索引加速
+                    condition = Article.article_title.istartswith(keyword, autoescape=True)
+                else:
+                    condition = func.lower(Article.article_title).startswith(keyword.lower(), autoescape=True)
+            elif dialect == "mysql" and len(mysql_phrase) >= MYSQL_NGRAM_TOKEN_SIZE:
+                # 按短语匹配，避免关键词中的布尔运算符（+ - * @ 等）改变查询含义，与 SQLite 行为一致
+                condition = text(
+                    "MATCH(article_title, article_content) AGAINST(:q IN BOOLEAN MODE)"
+                ).bindparams(q=f'"{mysql_phrase}"')
+            elif dialect == "postgresql":
+                # ILIKE 子串匹配由 pg_trgm 索引加速；tsvector 分词无法切分中文，不适用于本项目内容
+                condition = (
+                    Article.article_title.icontains(keyword, autoescape=True) |
+                    Article.article_content.icontains(keyword, autoescape=True)
+                )
+            else:
+                # 其他数据库（或过短的关键词）回退到 LIKE 模糊搜索
+                condition = (
+                    Article.article_title.contains(keyword) |
+                    Article.article_content.contains(keyword)
+                )
+
+            stmt = select(Article, func.count().over().label("total_count")).options(
+                selectinload(Article.article_author)
+            ).where(condition).order_by(Article.article_created_time.desc()).offset(
+                offset
+            ).limit(page_size)
+            rows = db.execute(stmt).all()
+            total = rows[0].total_count if rows else 0
+            if not rows and offset > 0:
+                # 页码超出范围时窗口函数没有返回行，单独统计总数
+                total = db.execute(select(func.count()).select_from(Article).where(condition)).scalar()
+            articles = [row[0] for row in rows]
         
         return {
             "articles": articles,
@@ -237,32 +524,116 @@ def search_articles(keyword: str, page: int = 1, page_size: int = 20):
             "page_size": page_size,
             "total_pages": (total + page_size - 1) // page_size
         }
-    finally:
-        db.close()
 
 
 def get_article_with_relations(article_id: int):
     """
     获取文章及其关联数据（用户、评论、标签）
-    使用 JOIN 查询减少数据库往返
+    使用 selectinload 预加载关联数据，减少数据库往返
     """
-    db = SessionLocal()
-    try:
-        # 使用 JOIN 一次性获取所有相关数据
-        article = db.query(Article).filter(Article.article_id == article_id).first()
+    with session_scope() as db:
+        # 文章查询后，评论（含评论作者）和标签各用一条 IN 查询批量加载
+        stmt = select(Article).options(
+            selectinload(Article.article_comments).options(
+                undefer(Comment.comment_content),
+                selectinload(Comment.comment_author)
+            ),
+            selectinload(Article.article_labels)
+        ).where(Article.article_id == article_id)
+        article = db.execute(stmt).scalar_one_or_none()
         if article:
-            # 预加载关联数据
-            comments = db.query(Comment).filter(Comment.comment_article_id == article_id).all()
-            labels = db.query(Label).filter(Label.label_article_id == article_id).all()
-            
             return {
                 "article": article,
-                "comments": comments,
-                "labels": labels
+                "comments": article.article_comments,
+                "labels": article.article_labels
             }
         return None
-    finally:
-        db.close()
+
+
+# 批量写入函数
+BULK_INSERT_BATCH_SIZE = 500  # 每批插入的行数
+
+
+def bulk_create_articles(rows: list[dict]):
+    """
+    批量创建文章，rows 为文章字段字典列表
+    绕过 ORM 工作单元逐行构建对象，直接按批次执行多行 INSERT，所有批次在同一事务中提交
+    """
+    with session_scope() as db:
+        if engine.dialect.name == "sqlite":
+            # 一开始就获取写锁，避免延迟事务在首次写入时因锁升级失败而报 database is locked
+            connection = db.connection()
+            if not connection.connection.dbapi_connection.in_transaction:
+                connection.exec_driver_sql("BEGIN IMMEDIATE")
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            db.execute(insert(Article), rows[start:start + BULK_INSERT_BATCH_SIZE])
+    return len(rows)
+
+
+# 用户信息缓存：用户信息读多写少，缓存列元组而不是 ORM 实例，避免脱离会话后的访问问题
+USER_CACHE_TTL = 300  # 缓存有效期（秒）
+USER_CACHE_MAXSIZE = 4096  # 最大缓存条目数
+_user_cache = OrderedDict()  # 按最近使用顺序排列，最久未使用的条目在最前
+_user_cache_lock = threading.Lock()
+_user_cache_generation = 0  # 每次失效时递增，用于丢弃失效前开始的查询结果
+
+
+def get_user_by_id(user_id: int):
+    """
+    按 ID 获取用户基本信息（user_id, user_name, user_email, user_avatar_url）
+    命中缓存时不访问数据库，用户不存在时返回 None
+    """
+    now = time.monotonic()
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+        if cached and cached[0] > now:
+            _user_cache.move_to_end(user_id)
+            return cached[1]
+        generation = _user_cache_generation
+
+    with session_scope() as db:
+        user = db.execute(
+            select(User.user_id, User.user_name, User.user_email, User.user_avatar_url)
+            .where(User.user_id == user_id)
+        ).first()
+        # 会话中有未提交的修改时（如嵌套在外层事务中），查询结果可能回滚，不写入缓存
+        cacheable = not (db.new or db.dirty or db.deleted or db.info.get("changed_user_ids"))
+
+    if user is not None and cacheable:
+        with _user_cache_lock:
+            # 查询期间发生过失效则放弃写入，避免缓存旧数据
+            if generation == _user_cache_generation:
+                # 先移除过期的旧条目，只有新增条目时才淘汰最久未使用的条目
+                if _user_cache.pop(user_id, None) is None and len(_user_cache) >= USER_CACHE_MAXSIZE:
+                    _user_cache.popitem(last=False)
+                _user_cache[user_id] = (now + USER_CACHE_TTL, user)
+    return user
+
+
+def invalidate_user(user_id: int):
+    """使指定用户的缓存失效"""
+    global _user_cache_generation
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+        _user_cache_generation += 1
+
+
+# 用户更新或删除时记录用户 ID，在事务提交或回滚后清除缓存，
+# 避免提交前的查询把未提交的数据重新写入缓存
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _record_changed_user(mapper, connection, target):
+    invalidate_user(target.user_id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.user_id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+@event.listens_for(SessionLocal, "after_rollback")
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
 
 
 # 主函数